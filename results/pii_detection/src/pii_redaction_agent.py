@@ -18,19 +18,65 @@ Usage:
 
 import os
 import sys
+import glob
+import hashlib
 import json
 import time
 import re
 import argparse
+import bisect
+import threading
+from array import array
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from typing import List, Dict, Any, Tuple
 from dataclasses import dataclass
 from enum import Enum
+import logging
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Add the current directory to path for env_loader
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from env_loader import load_dotenv
 
+logger = logging.getLogger(__name__)
+
+# Optional: orjson encodes/parses the (potentially large) prompts and model
+# responses ~3x faster than stdlib json
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps_bytes = orjson.dumps
+except Exception:
+    orjson = None
+    _json_loads = json.loads
+
+    def _json_dumps_bytes(obj):
+        return json.dumps(obj).encode("utf-8")
+
+# Optional: Hyperscan (JIT'd DFA engine) accelerates the regex scan on large
+# documents and removes backtracking risk. pip install hyperscan to enable.
+try:
+    import hyperscan
+except Exception:
+    hyperscan = None
+
+# Optional: a local ONNX NER model (e.g. dslim/bert-base-NER exported to ONNX)
+# adds deterministic NAME/ADDRESS detection without spending AOAI tokens.
+# pip install onnxruntime tokenizers and set PII_NER_MODEL_PATH /
+# PII_NER_TOKENIZER_PATH to enable.
+try:
+    import onnxruntime
+except Exception:
+    onnxruntime = None
+try:
+    from tokenizers import Tokenizer
+except Exception:
+    Tokenizer = None
+
 class PIIType(Enum):
     """Types of PII that can be detected and redacted"""
     SSN = "Social Security Number"
@@ -46,6 +92,88 @@ class PIIType(Enum):
     IP_ADDRESS = "IP Address"
     URL = "URL"
 
+# Regex patterns for common PII types, used as backup detection alongside the AI pass
+PII_PATTERNS = {
+    PIIType.SSN: r'\b\d{3}-?\d{2}-?\d{4}\b',
+    PIIType.EMAIL: r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    PIIType.PHONE: r'\b(?:\+?1[-.\s]?)?\(?[0-9]{3}\)?[-.\s]?[0-9]{3}[-.\s]?[0-9]{4}\b',
+    PIIType.CREDIT_CARD: r'\b(?:\d{4}[-\s]?){3}\d{4}\b',
+    PIIType.IP_ADDRESS: r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b',
+}
+
+# All patterns fused into one alternation so a single pass over the text
+# finds every PII class; compiled once at import instead of per call
+_PII_RE = re.compile(
+    "|".join(f"(?P<{pii_type.name}>{pattern})" for pii_type, pattern in PII_PATTERNS.items()),
+    re.IGNORECASE
+)
+
+# Literal keyword cues for identifier-style PII that has no reliable standalone
+# pattern (license, passport, account numbers); the value following the cue is
+# matched separately by _ID_AFTER_KEYWORD_RE
+PII_KEYWORD_PREFIXES = {
+    "passport no": PIIType.PASSPORT,
+    "passport number": PIIType.PASSPORT,
+    "passport": PIIType.PASSPORT,
+    "driver's license": PIIType.DRIVER_LICENSE,
+    "driver license": PIIType.DRIVER_LICENSE,
+    "license no": PIIType.DRIVER_LICENSE,
+    "license number": PIIType.DRIVER_LICENSE,
+    "dl#": PIIType.DRIVER_LICENSE,
+    "bank account": PIIType.BANK_ACCOUNT,
+    "account number": PIIType.BANK_ACCOUNT,
+    "account no": PIIType.BANK_ACCOUNT,
+    "routing number": PIIType.BANK_ACCOUNT,
+    "iban": PIIType.BANK_ACCOUNT,
+}
+
+# Identifier expected right after a keyword cue: optional separator, then a
+# run of letters/digits long enough to be an id
+_ID_AFTER_KEYWORD_RE = re.compile(r"[:#.\s]*([A-Z0-9][A-Z0-9-]{4,19})", re.IGNORECASE)
+
+# Optional: pyahocorasick scans every keyword in one trie pass, O(N) in the
+# text regardless of how many cues are registered
+try:
+    import ahocorasick
+    _PII_KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _keyword, _pii_type in PII_KEYWORD_PREFIXES.items():
+        _PII_KEYWORD_AUTOMATON.add_word(_keyword, (_keyword, _pii_type))
+    _PII_KEYWORD_AUTOMATON.make_automaton()
+except Exception:
+    ahocorasick = None
+    _PII_KEYWORD_AUTOMATON = None
+
+# Fallback alternation when pyahocorasick is missing; longest cues first so
+# "passport number" wins over "passport"
+_PII_KEYWORD_RE = re.compile(
+    "|".join(re.escape(keyword) for keyword in sorted(PII_KEYWORD_PREFIXES, key=len, reverse=True)),
+    re.IGNORECASE
+)
+
+# Strips a ```json ... ``` fence in one pass if the model still emits one
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+# Pattern ids for the Hyperscan database map back into this list
+_PII_TYPES_BY_ID = list(PII_PATTERNS)
+
+def _build_hyperscan_db():
+    """Compile the PII patterns into a Hyperscan database, or None if unavailable"""
+    if hyperscan is None:
+        return None
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[pattern.encode("utf-8") for pattern in PII_PATTERNS.values()],
+            ids=list(range(len(PII_PATTERNS))),
+            flags=[hyperscan.HS_FLAG_SOM_LEFTMOST | hyperscan.HS_FLAG_CASELESS] * len(PII_PATTERNS),
+        )
+        return db
+    except Exception as e:
+        logger.warning("Hyperscan unavailable, falling back to re: %s", e)
+        return None
+
+_PII_HS_DB = _build_hyperscan_db()
+
 @dataclass
 class PIIEntity:
     """Represents a detected PII entity"""
@@ -57,6 +185,26 @@ class PIIEntity:
     page_number: int = None
     bounding_box: Dict = None
 
+class PIIEntityBatch:
+    """Structure-of-arrays view over a list of PIIEntity objects.
+
+    The dedup sweep only reads positions, so it walks compact array('l')
+    columns instead of dereferencing a full dataclass per entity. PIIEntity
+    objects are materialized only for the entries that survive.
+    """
+
+    def __init__(self, entities: List[PIIEntity]):
+        self.entities = entities
+        self.starts = array('l', (e.start_position for e in entities))
+        self.ends = array('l', (e.end_position for e in entities))
+
+    def __len__(self):
+        return len(self.entities)
+
+    def take(self, indices: List[int]) -> List[PIIEntity]:
+        """Materialize PIIEntity objects for the selected rows"""
+        return [self.entities[i] for i in indices]
+
 @dataclass
 class RedactionResult:
     """Results of the redaction process"""
@@ -66,10 +214,52 @@ class RedactionResult:
     redaction_summary: Dict[str, int]
     timestamp: str
 
+class RateLimiter:
+    """Token-bucket rate limiter for Azure OpenAI requests and tokens per minute.
+
+    Reserving capacity before dispatch spreads load evenly across the TPM/RPM
+    quota instead of reacting to 429s with expensive retry backoff.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self._request_bucket = float(requests_per_minute)
+        self._token_bucket = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._request_bucket = min(self.rpm, self._request_bucket + elapsed * self.rpm / 60.0)
+        self._token_bucket = min(self.tpm, self._token_bucket + elapsed * self.tpm / 60.0)
+
+    @contextmanager
+    def reserve(self, estimated_tokens: int):
+        """Block until one request and estimated_tokens of quota are available"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._request_bucket >= 1 and self._token_bucket >= estimated_tokens:
+                    self._request_bucket -= 1
+                    self._token_bucket -= estimated_tokens
+                    break
+                # Wait for whichever bucket is further from covering the reservation
+                request_wait = (1 - self._request_bucket) * 60.0 / self.rpm
+                token_wait = (estimated_tokens - self._token_bucket) * 60.0 / self.tpm
+                wait = max(request_wait, token_wait, 0.05)
+            time.sleep(wait)
+        yield
+
 class PIIRedactionAgent:
     """Main agent class for PII detection and redaction"""
     
-    def __init__(self):
+    def __init__(self, initial_polling_delay: float = 0.25, max_polling_delay: float = 5.0,
+                 polling_deadline: float = 120.0, requests_per_minute: int = 60,
+                 tokens_per_minute: int = 90000, use_cache: bool = True,
+                 cache_dir: str = None):
         load_dotenv()
         self.docintel_endpoint = os.environ.get("AZURE_DOCINTEL_ENDPOINT", "").rstrip("/")
         self.docintel_key = os.environ.get("AZURE_DOCINTEL_KEY", "")
@@ -77,19 +267,70 @@ class PIIRedactionAgent:
         self.aoai_key = os.environ.get("AZURE_OPENAI_KEY", "")
         self.aoai_deployment = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "")
         self.aoai_version = os.environ.get("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
+
+        # Polling tuning for Document Intelligence (exponential backoff)
+        self.initial_polling_delay = initial_polling_delay
+        self.max_polling_delay = max_polling_delay
+        self.polling_deadline = polling_deadline
+
+        # Preemptive rate limiting for Azure OpenAI (see RateLimiter)
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+
+        # Disk cache for AI detections, keyed by deployment + text content.
+        # Re-runs of unchanged documents skip the LLM call entirely.
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir or os.path.expanduser("~/.cache/pii_redaction")
+
+        # One pooled keep-alive session per service; bare requests calls paid
+        # a fresh TCP+TLS handshake on every request, including each poll
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        self._docintel_session = requests.Session()
+        self._docintel_session.headers.update({"Ocp-Apim-Subscription-Key": self.docintel_key})
+        self._docintel_session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry))
+        self._aoai_session = requests.Session()
+        self._aoai_session.headers.update({"api-key": self.aoai_key})
+        self._aoai_session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry))
+
+        # Optional local NER layer (see detect_pii_with_ner), lazily loaded
+        self.ner_model_path = os.environ.get("PII_NER_MODEL_PATH", "")
+        self.ner_tokenizer_path = os.environ.get("PII_NER_TOKENIZER_PATH", "")
+        self._ner_session = None
+        self._ner_tokenizer = None
         
         # Validate configuration
         assert self.docintel_endpoint and self.docintel_key, "Set AZURE_DOCINTEL_ENDPOINT and AZURE_DOCINTEL_KEY"
         assert self.aoai_endpoint and self.aoai_key and self.aoai_deployment, "Set Azure OpenAI environment variables"
         
-        print("PII Redaction Agent initialized")
-        print(f"Document Intelligence: {self.docintel_endpoint[:50]}...")
-        print(f"Azure OpenAI: {self.aoai_deployment}")
+        logger.info("PII Redaction Agent initialized")
+        logger.info("Document Intelligence: %s...", self.docintel_endpoint[:50])
+        logger.info("Azure OpenAI: %s", self.aoai_deployment)
+
+    def _ocr_cache_path(self, file_path: str) -> str:
+        """Cache file for a DocIntel result, keyed by the document's content hash"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(65536), b""):
+                digest.update(block)
+        return os.path.join(self.cache_dir, "ocr", f"{digest.hexdigest()}.json")
 
     def analyze_document(self, file_path: str, model: str = "prebuilt-layout") -> Dict[str, Any]:
         """Analyze document with Azure Document Intelligence"""
-        print(f"Analyzing document: {file_path}")
-        
+        logger.info("Analyzing document: %s", file_path)
+
+        # OCR output for identical bytes never changes, so cached results skip
+        # the REST round-trip entirely (the slowest step of the pipeline)
+        cache_path = None
+        if self.use_cache:
+            cache_path = self._ocr_cache_path(file_path)
+            if os.path.exists(cache_path):
+                try:
+                    with open(cache_path, 'r', encoding='utf-8') as f:
+                        result = json.load(f)
+                    logger.info("Document analysis loaded from cache")
+                    return result
+                except (OSError, json.JSONDecodeError):
+                    pass
+
         url = f"{self.docintel_endpoint}/formrecognizer/documentModels/{model}:analyze?api-version=2023-07-31"
         
         # Determine content type
@@ -101,14 +342,16 @@ class PIIRedactionAgent:
         
         headers = {
             "Ocp-Apim-Subscription-Key": self.docintel_key,
-            "Content-Type": content_type
+            "Content-Type": content_type,
         }
-        
+
+        # Passing the file object lets requests stream the upload with a
+        # correct auto-computed Content-Length
         with open(file_path, "rb") as f:
-            response = requests.post(url, headers=headers, data=f, timeout=60)
+            response = self._docintel_session.post(url, headers=headers, data=f, timeout=60)
         
         if not response.ok:
-            print(f"Document Intelligence error {response.status_code}: {response.text}")
+            logger.error("Document Intelligence error %s: %s", response.status_code, response.text)
             response.raise_for_status()
         
         # Poll for results
@@ -116,26 +359,37 @@ class PIIRedactionAgent:
         if not operation_location:
             raise RuntimeError("No operation-location header returned")
         
-        print("Waiting for analysis to complete...")
-        for i in range(30):
-            poll_response = requests.get(
-                operation_location, 
-                headers={"Ocp-Apim-Subscription-Key": self.docintel_key}, 
-                timeout=60
-            )
+        logger.info("Waiting for analysis to complete...")
+        delay = self.initial_polling_delay
+        deadline = time.monotonic() + self.polling_deadline
+        while time.monotonic() < deadline:
+            poll_response = self._docintel_session.get(operation_location, timeout=60)
             poll_response.raise_for_status()
             result = poll_response.json()
             status = result.get("status", "").lower()
-            
+
             if status == "succeeded":
-                print("Document analysis complete")
+                logger.info("Document analysis complete")
+                if cache_path:
+                    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                    with open(cache_path, 'w', encoding='utf-8') as f:
+                        json.dump(result, f)
                 return result
             elif status == "failed":
                 raise RuntimeError(f"Document analysis failed: {result}")
-            
-            print(f"Status: {status} ({i+1}/30)")
-            time.sleep(2)
-        
+
+            # Honor the service's Retry-After hint when present, otherwise back off exponentially
+            retry_after = poll_response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    delay = min(float(retry_after), self.max_polling_delay)
+                except ValueError:
+                    pass
+
+            logger.debug("Status: %s (next poll in %.2fs)", status, delay)
+            time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+            delay = min(delay * 2, self.max_polling_delay)
+
         raise RuntimeError("Timeout waiting for document analysis")
 
     def extract_text_content(self, analysis_result: Dict[str, Any]) -> str:
@@ -157,11 +411,9 @@ class PIIRedactionAgent:
         
         return text_content.strip()
 
-    def detect_pii_with_ai(self, text_content: str) -> List[PIIEntity]:
-        """Use Azure OpenAI to detect PII entities in text"""
-        print("Analyzing text for PII with Azure OpenAI...")
-        
-        prompt = f"""
+    def _build_pii_prompt(self, text_content: str) -> str:
+        """Build the PII detection prompt for a block of text"""
+        return f"""
 You are a PII (Personally Identifiable Information) detection expert. Analyze the following text and identify ALL PII entities.
 
 For each PII entity found, provide:
@@ -170,21 +422,114 @@ For each PII entity found, provide:
 3. Confidence level (0.0 to 1.0)
 4. Start and end character positions in the text
 
-Return ONLY a JSON array with this format:
-[
-  {{
-    "text": "exact PII text",
-    "pii_type": "PII_TYPE",
-    "confidence": 0.95,
-    "start_position": 123,
-    "end_position": 135
-  }}
-]
+Return ONLY a JSON object with this format:
+{{
+  "entities": [
+    {{
+      "text": "exact PII text",
+      "pii_type": "PII_TYPE",
+      "confidence": 0.95,
+      "start_position": 123,
+      "end_position": 135
+    }}
+  ]
+}}
 
 Text to analyze:
 {text_content}
 """
 
+    def _chunk(self, text: str, size: int = 3000, overlap: int = 200) -> List[Tuple[int, str]]:
+        """Split text into overlapping (offset, chunk) windows for the AI pass"""
+        if len(text) <= size:
+            return [(0, text)]
+        step = size - overlap
+        return [(start, text[start:start + size]) for start in range(0, len(text), step)]
+
+    def detect_pii_with_ai(self, text_content: str, chunk_size: int = 3000,
+                           chunk_overlap: int = 200) -> List[PIIEntity]:
+        """Use Azure OpenAI to detect PII entities in text.
+
+        Long documents are split into overlapping chunks dispatched
+        concurrently, so wall time tracks the slowest chunk instead of the
+        sum, and detections past a single prompt window are no longer lost.
+        """
+        logger.info("Analyzing text for PII with Azure OpenAI...")
+
+        chunks = self._chunk(text_content, chunk_size, chunk_overlap)
+        if len(chunks) == 1:
+            pii_entities = self._detect_pii_in_chunk(text_content)
+        else:
+            logger.info("Dispatching %d overlapping chunks concurrently", len(chunks))
+            pii_entities = []
+            with ThreadPoolExecutor(max_workers=min(len(chunks), 8)) as executor:
+                futures = {executor.submit(self._detect_pii_in_chunk, chunk): offset
+                           for offset, chunk in chunks}
+                for future in as_completed(futures):
+                    offset = futures[future]
+                    for entity in future.result():
+                        # Map chunk-local positions back into the full text
+                        entity.start_position += offset
+                        entity.end_position += offset
+                        pii_entities.append(entity)
+            # Overlapping windows report the same entity twice
+            pii_entities = self.deduplicate_entities(pii_entities)
+
+        logger.info("Found %d PII entities", len(pii_entities))
+        return pii_entities
+
+    def _ai_cache_path(self, text_content: str) -> str:
+        """Cache file for a chunk of text, keyed by deployment, API version and content"""
+        key = hashlib.sha256(
+            f"{self.aoai_deployment}|{self.aoai_version}|{text_content}".encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.cache_dir, "ai", key[:2], f"{key}.json")
+
+    def _cache_load_entities(self, cache_path: str) -> List[PIIEntity]:
+        """Load cached detections, or None on a cache miss"""
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                items = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return [
+            PIIEntity(
+                text=item["text"],
+                pii_type=PIIType[item["pii_type"]],
+                confidence=item["confidence"],
+                start_position=item["start_position"],
+                end_position=item["end_position"]
+            )
+            for item in items
+        ]
+
+    def _cache_save_entities(self, cache_path: str, entities: List[PIIEntity]):
+        """Persist detections for reuse on identical input"""
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump([
+                {
+                    "text": entity.text,
+                    "pii_type": entity.pii_type.name,
+                    "confidence": entity.confidence,
+                    "start_position": entity.start_position,
+                    "end_position": entity.end_position
+                }
+                for entity in entities
+            ], f)
+
+    def _detect_pii_in_chunk(self, text_content: str) -> List[PIIEntity]:
+        """Run one PII detection call against Azure OpenAI"""
+        if self.use_cache:
+            cache_path = self._ai_cache_path(text_content)
+            cached = self._cache_load_entities(cache_path)
+            if cached is not None:
+                return cached
+
+        prompt = self._build_pii_prompt(text_content)
+
         url = f"{self.aoai_endpoint}/openai/deployments/{self.aoai_deployment}/chat/completions?api-version={self.aoai_version}"
         headers = {
             "Content-Type": "application/json",
@@ -194,7 +539,7 @@ Text to analyze:
             "messages": [
                 {
                     "role": "system", 
-                    "content": "You are an expert PII detection system. Return only valid JSON arrays."
+                    "content": "You are an expert PII detection system. Return only valid JSON objects."
                 },
                 {
                     "role": "user", 
@@ -202,25 +547,62 @@ Text to analyze:
                 }
             ],
             "temperature": 0.1,
-            "max_tokens": 2000
+            "max_tokens": 2000,
+            "response_format": {"type": "json_object"},
+            "stream": True
         }
-        
-        response = requests.post(url, headers=headers, json=payload, timeout=120)
+
+        # Encode the body once up front (orjson when available) instead of
+        # letting requests re-serialize the large prompt with stdlib json
+        body = _json_dumps_bytes(payload)
+
+        # Rough token estimate (~4 chars/token) plus the completion budget
+        estimated_tokens = len(prompt) // 4 + payload["max_tokens"]
+        with self.rate_limiter.reserve(estimated_tokens):
+            response = self._aoai_session.post(url, headers=headers, data=body, timeout=120, stream=True)
         response.raise_for_status()
-        
-        ai_response = response.json()
-        ai_content = ai_response["choices"][0]["message"]["content"].strip()
-        
+
+        # Consume the SSE stream as tokens arrive instead of blocking on the
+        # full completion body; other work (the regex/NER passes) overlaps
+        # with this download in process_document
+        content_parts = []
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            try:
+                chunk = _json_loads(data)
+            except ValueError:
+                continue
+            choices = chunk.get("choices")
+            if choices:
+                delta_content = choices[0].get("delta", {}).get("content")
+                if delta_content:
+                    content_parts.append(delta_content)
+
+        ai_content = "".join(content_parts).strip()
+
+        pii_entities = self._parse_ai_entities(ai_content)
+        if self.use_cache:
+            self._cache_save_entities(cache_path, pii_entities)
+        return pii_entities
+
+    def _parse_ai_entities(self, ai_content: str) -> List[PIIEntity]:
+        """Parse the model's JSON response into PIIEntity objects"""
         # Extract JSON from response
         try:
-            # Remove code block markers if present
-            if "```json" in ai_content:
-                ai_content = ai_content.split("```json")[1].split("```")[0]
-            elif "```" in ai_content:
-                ai_content = ai_content.split("```")[1].split("```")[0]
-            
-            pii_data = json.loads(ai_content)
-            
+            # Remove code block markers if present (response_format usually
+            # means raw JSON, but older deployments may still fence it)
+            fence_match = _FENCE_RE.search(ai_content)
+            if fence_match:
+                ai_content = fence_match.group(1)
+
+            pii_data = _json_loads(ai_content)
+            if isinstance(pii_data, dict):
+                pii_data = pii_data.get("entities", [])
+
             # Convert to PIIEntity objects
             pii_entities = []
             for item in pii_data:
@@ -229,7 +611,7 @@ Text to analyze:
                 except ValueError:
                     # Handle unknown PII types
                     continue
-                
+
                 entity = PIIEntity(
                     text=item["text"],
                     pii_type=pii_type,
@@ -238,76 +620,233 @@ Text to analyze:
                     end_position=item["end_position"]
                 )
                 pii_entities.append(entity)
-            
-            print(f"Found {len(pii_entities)} PII entities")
+
             return pii_entities
-            
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse AI response as JSON: {e}")
-            print(f"Response: {ai_content}")
+
+        except ValueError as e:  # covers json and orjson decode errors
+            logger.error("Failed to parse AI response as JSON: %s", e)
+            logger.debug("Response: %s", ai_content)
             return []
 
+    # BIO label order emitted by dslim/bert-base-NER-style checkpoints
+    _NER_LABELS = ["O", "B-MISC", "I-MISC", "B-PER", "I-PER", "B-ORG", "I-ORG", "B-LOC", "I-LOC"]
+    # ORG has no PIIType counterpart and is deliberately skipped
+    _NER_TYPE_MAP = {"PER": PIIType.NAME, "LOC": PIIType.ADDRESS}
+
+    def _load_ner(self) -> bool:
+        """Lazily load the ONNX NER session and tokenizer; False when unavailable"""
+        if self._ner_session is not None:
+            return True
+        if onnxruntime is None or Tokenizer is None:
+            return False
+        if not (self.ner_model_path and os.path.exists(self.ner_model_path) and
+                self.ner_tokenizer_path and os.path.exists(self.ner_tokenizer_path)):
+            return False
+        try:
+            self._ner_session = onnxruntime.InferenceSession(
+                self.ner_model_path, providers=["CPUExecutionProvider"]
+            )
+            self._ner_tokenizer = Tokenizer.from_file(self.ner_tokenizer_path)
+            return True
+        except Exception as e:
+            logger.warning("Local NER model unavailable: %s", e)
+            self._ner_session = None
+            return False
+
+    def detect_pii_with_ner(self, text: str, max_seq_len: int = 256) -> List[PIIEntity]:
+        """Detect NAME/ADDRESS entities with a local ONNX NER model.
+
+        A deterministic second layer next to the regex pass: the regex
+        patterns only cover structured PII, so without this every NAME and
+        ADDRESS detection depends on the paid Azure OpenAI call. Returns []
+        when the optional model or runtime is not installed.
+        """
+        if not self._load_ner():
+            return []
+
+        import numpy as np  # ships with onnxruntime
+
+        encoding = self._ner_tokenizer.encode(text)
+        ids, offsets = encoding.ids, encoding.offsets
+
+        # One batched session.run over fixed-size token windows
+        windows = [ids[i:i + max_seq_len] for i in range(0, len(ids), max_seq_len)]
+        input_ids = np.zeros((len(windows), max_seq_len), dtype=np.int64)
+        attention_mask = np.zeros_like(input_ids)
+        for row, window in enumerate(windows):
+            input_ids[row, :len(window)] = window
+            attention_mask[row, :len(window)] = 1
+
+        logits = self._ner_session.run(
+            None, {"input_ids": input_ids, "attention_mask": attention_mask}
+        )[0]
+        label_ids = logits.argmax(axis=-1)
+
+        # Collapse contiguous B-/I- tokens of the same type into one entity
+        ner_entities = []
+        current_type, span_start, span_end = None, 0, 0
+
+        def flush():
+            if current_type is not None and span_end > span_start:
+                ner_entities.append(PIIEntity(
+                    text=text[span_start:span_end],
+                    pii_type=current_type,
+                    confidence=0.85,
+                    start_position=span_start,
+                    end_position=span_end
+                ))
+
+        for row, window in enumerate(windows):
+            for col in range(len(window)):
+                token_index = row * max_seq_len + col
+                offset = offsets[token_index]
+                label = self._NER_LABELS[label_ids[row, col]]
+                pii_type = self._NER_TYPE_MAP.get(label.split("-")[-1])
+                if label.startswith("I-") and pii_type is not None and pii_type == current_type:
+                    span_end = offset[1]
+                    continue
+                flush()
+                if label.startswith("B-") and pii_type is not None:
+                    current_type, span_start, span_end = pii_type, offset[0], offset[1]
+                else:
+                    current_type = None
+        flush()
+
+        logger.info("Local NER found %d entities", len(ner_entities))
+        return ner_entities
+
     def apply_regex_patterns(self, text: str) -> List[PIIEntity]:
         """Apply regex patterns for common PII types as backup detection"""
-        patterns = {
-            PIIType.SSN: r'\b\d{3}-?\d{2}-?\d{4}\b',
-            PIIType.EMAIL: r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            PIIType.PHONE: r'\b(?:\+?1[-.\s]?)?\(?[0-9]{3}\)?[-.\s]?[0-9]{3}[-.\s]?[0-9]{4}\b',
-            PIIType.CREDIT_CARD: r'\b(?:\d{4}[-\s]?){3}\d{4}\b',
-            PIIType.IP_ADDRESS: r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b',
-        }
-        
-        regex_entities = []
-        for pii_type, pattern in patterns.items():
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                entity = PIIEntity(
-                    text=match.group(),
-                    pii_type=pii_type,
+        # Hyperscan scans all patterns in one DFA pass; byte offsets only equal
+        # character offsets for ASCII text, so anything else uses the re path
+        encoded = text.encode("utf-8")
+        if _PII_HS_DB is not None and len(encoded) == len(text):
+            spans = []
+            _PII_HS_DB.scan(
+                encoded,
+                match_event_handler=lambda pat_id, start, end, flags, ctx: spans.append((pat_id, start, end))
+            )
+            return [
+                PIIEntity(
+                    text=text[start:end],
+                    pii_type=_PII_TYPES_BY_ID[pat_id],
                     confidence=0.8,  # High confidence for regex matches
-                    start_position=match.start(),
-                    end_position=match.end()
+                    start_position=start,
+                    end_position=end
                 )
-                regex_entities.append(entity)
-        
+                for pat_id, start, end in spans
+            ]
+
+        regex_entities = []
+        for match in _PII_RE.finditer(text):
+            entity = PIIEntity(
+                text=match.group(),
+                pii_type=PIIType[match.lastgroup],
+                confidence=0.8,  # High confidence for regex matches
+                start_position=match.start(),
+                end_position=match.end()
+            )
+            regex_entities.append(entity)
+
         return regex_entities
 
+    def deduplicate_entities(self, entities: List[PIIEntity]) -> List[PIIEntity]:
+        """Deduplicate near-overlapping detections.
+
+        Entities are processed in their original order, so callers that list
+        AI detections before regex detections keep the AI entity. Each
+        candidate is only compared against the already-kept entities whose
+        start lies within the 5-char window, located by bisecting a sorted
+        start list, instead of the old all-pairs nested loop.
+        """
+        batch = PIIEntityBatch(entities)
+        starts, ends = batch.starts, batch.ends
+
+        kept = []
+        kept_starts = []  # sorted starts of kept entities, for the bisect window
+        kept_by_start = []  # kept indices, parallel to kept_starts
+        for i in range(len(batch)):
+            lo = bisect.bisect_left(kept_starts, starts[i] - 4)
+            hi = bisect.bisect_right(kept_starts, starts[i] + 4)
+            if any(abs(ends[i] - ends[j]) < 5 for j in kept_by_start[lo:hi]):
+                continue
+            kept.append(i)
+            insert_at = bisect.bisect_left(kept_starts, starts[i])
+            kept_starts.insert(insert_at, starts[i])
+            kept_by_start.insert(insert_at, i)
+        return batch.take(kept)
+
+    def apply_keyword_prefixes(self, text: str) -> List[PIIEntity]:
+        """Detect identifier-style PII anchored by literal keyword cues.
+
+        Driver-license, passport and bank-account numbers have no reliable
+        standalone shape, but in real documents they follow a label. A single
+        Aho-Corasick pass locates every cue (regex-alternation fallback when
+        pyahocorasick is not installed) and the identifier right after each
+        cue is emitted as the entity.
+        """
+        lowered = text.lower()
+        cue_hits = []
+        if _PII_KEYWORD_AUTOMATON is not None:
+            for end_index, (keyword, pii_type) in _PII_KEYWORD_AUTOMATON.iter(lowered):
+                cue_hits.append((end_index + 1, pii_type))
+        else:
+            for match in _PII_KEYWORD_RE.finditer(text):
+                cue_hits.append((match.end(), PII_KEYWORD_PREFIXES[match.group().lower()]))
+
+        keyword_entities = []
+        for cue_end, pii_type in cue_hits:
+            id_match = _ID_AFTER_KEYWORD_RE.match(text, cue_end)
+            if id_match:
+                keyword_entities.append(PIIEntity(
+                    text=id_match.group(1),
+                    pii_type=pii_type,
+                    confidence=0.7,  # Cue-anchored, value shape only loosely checked
+                    start_position=id_match.start(1),
+                    end_position=id_match.end(1)
+                ))
+        return keyword_entities
+
+    def _iter_redacted_pieces(self, original_text: str, pii_entities: List[PIIEntity]):
+        """Yield untouched slices and redaction placeholders in document order.
+
+        Generator form lets callers stream the pieces straight into a file
+        without ever materializing the full redacted string next to the
+        original text.
+        """
+        sorted_entities = sorted(pii_entities, key=lambda x: x.start_position)
+
+        cursor = 0
+        for entity in sorted_entities:
+            if entity.start_position < cursor:
+                # Overlaps a span that is already redacted
+                cursor = max(cursor, entity.end_position)
+                continue
+            yield original_text[cursor:entity.start_position]
+            yield f"[REDACTED-{entity.pii_type.name}]"
+            cursor = entity.end_position
+        yield original_text[cursor:]
+
     def create_redacted_text(self, original_text: str, pii_entities: List[PIIEntity]) -> str:
         """Create redacted version of text"""
-        redacted_text = original_text
-        
-        # Sort entities by position (reverse order to maintain positions)
-        sorted_entities = sorted(pii_entities, key=lambda x: x.start_position, reverse=True)
-        
-        for entity in sorted_entities:
-            # Create redaction placeholder
-            redaction = f"[REDACTED-{entity.pii_type.name}]"
-            
-            # Replace the PII text
-            redacted_text = (
-                redacted_text[:entity.start_position] + 
-                redaction + 
-                redacted_text[entity.end_position:]
-            )
-        
-        return redacted_text
+        return "".join(self._iter_redacted_pieces(original_text, pii_entities))
 
     def generate_redaction_report(self, pii_entities: List[PIIEntity]) -> Dict[str, Any]:
         """Generate a summary report of redactions"""
-        summary = {}
-        
-        # Count by PII type
+        # Count by PII type and total confidence in one pass
+        summary = Counter()
+        total_confidence = 0.0
         for entity in pii_entities:
-            pii_type_name = entity.pii_type.value
-            summary[pii_type_name] = summary.get(pii_type_name, 0) + 1
-        
+            summary[entity.pii_type.value] += 1
+            total_confidence += entity.confidence
+
         total_redactions = len(pii_entities)
-        avg_confidence = sum(e.confidence for e in pii_entities) / total_redactions if total_redactions > 0 else 0
-        
+        avg_confidence = total_confidence / total_redactions if total_redactions > 0 else 0
+
         return {
             "total_redactions": total_redactions,
             "average_confidence": round(avg_confidence, 3),
-            "by_type": summary,
+            "by_type": dict(summary),
             "entities": [
                 {
                     "text": "***REDACTED***",  # Don't include actual PII in report
@@ -321,6 +860,35 @@ Text to analyze:
 
     def process_document(self, input_file: str, output_file: str = None) -> RedactionResult:
         """Main method to process a document for PII redaction"""
+        logger.info("Starting PII redaction for: %s", input_file)
+
+        # Step 1: Analyze document with Document Intelligence
+        analysis_result = self.analyze_document(input_file)
+
+        # Step 2: Extract text content
+        text_content = self.extract_text_content(analysis_result)
+        logger.info("Extracted %d characters of text", len(text_content))
+
+        # Step 3: Detect PII with AI, with the deterministic backup passes
+        # running on a worker thread while the AI response streams in
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            backup_future = executor.submit(self._detect_backup_entities, text_content)
+            ai_entities = self.detect_pii_with_ai(text_content)
+            backup_entities = backup_future.result()
+
+        return self._finalize(input_file, text_content, ai_entities, output_file,
+                              backup_entities=backup_entities)
+
+    def _detect_backup_entities(self, text_content: str) -> List[PIIEntity]:
+        """Run the deterministic detection layers (NER, regex, keyword cues)"""
+        regex_entities = self.apply_regex_patterns(text_content)
+        keyword_entities = self.apply_keyword_prefixes(text_content)
+        ner_entities = self.detect_pii_with_ner(text_content)
+        return ner_entities + regex_entities + keyword_entities
+
+    def _finalize(self, input_file: str, text_content: str, ai_entities: List[PIIEntity],
+                  output_file: str = None, backup_entities: List[PIIEntity] = None) -> RedactionResult:
+        """Merge AI and regex detections, redact the text, and write outputs"""
         if not output_file:
             name, ext = os.path.splitext(os.path.basename(input_file))
             # Determine if it's an image or document to choose the right subfolder
@@ -328,46 +896,25 @@ Text to analyze:
                 output_file = f"../redacted_text/{name}_redacted.txt"
             else:
                 output_file = f"../redacted_text/{name}_redacted.txt"
+
+        # Step 4: Apply regex patterns, keyword cues, and the local NER layer
+        # as backup (unless the caller already ran them, overlapped with AI)
+        if backup_entities is None:
+            backup_entities = self._detect_backup_entities(text_content)
+
+        # Step 5: Combine and deduplicate entities (AI first so it wins position ties)
+        all_entities = ai_entities + backup_entities
+        unique_entities = self.deduplicate_entities(all_entities)
+
+        logger.info("Final count: %d unique PII entities detected", len(unique_entities))
         
-        print(f"Starting PII redaction for: {input_file}")
-        
-        # Step 1: Analyze document with Document Intelligence
-        analysis_result = self.analyze_document(input_file)
-        
-        # Step 2: Extract text content
-        text_content = self.extract_text_content(analysis_result)
-        print(f"Extracted {len(text_content)} characters of text")
-        
-        # Step 3: Detect PII with AI
-        ai_entities = self.detect_pii_with_ai(text_content)
-        
-        # Step 4: Apply regex patterns as backup
-        regex_entities = self.apply_regex_patterns(text_content)
-        
-        # Step 5: Combine and deduplicate entities
-        all_entities = ai_entities + regex_entities
-        # Simple deduplication based on position overlap
-        unique_entities = []
-        for entity in all_entities:
-            is_duplicate = False
-            for existing in unique_entities:
-                if (abs(entity.start_position - existing.start_position) < 5 and 
-                    abs(entity.end_position - existing.end_position) < 5):
-                    is_duplicate = True
-                    break
-            if not is_duplicate:
-                unique_entities.append(entity)
-        
-        print(f"Final count: {len(unique_entities)} unique PII entities detected")
-        
-        # Step 6: Create redacted text
-        redacted_text = self.create_redacted_text(text_content, unique_entities)
-        
-        # Step 7: Save redacted document
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(redacted_text)
-        
-        print(f"Redacted document saved: {output_file}")
+        # Steps 6+7: Stream redacted pieces straight to the output file so the
+        # full redacted string never sits in memory next to the original text
+        with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            for piece in self._iter_redacted_pieces(text_content, unique_entities):
+                f.write(piece)
+
+        logger.info("Redacted document saved: %s", output_file)
         
         # Step 8: Generate report
         report = self.generate_redaction_report(unique_entities)
@@ -377,7 +924,7 @@ Text to analyze:
         report_file = f"../reports/{name}_pii_report.json"
         with open(report_file, 'w', encoding='utf-8') as f:
             json.dump(report, f, indent=2)
-        print(f"Report saved: {report_file}")
+        logger.info("Report saved: %s", report_file)
         
         result = RedactionResult(
             original_file=input_file,
@@ -389,26 +936,184 @@ Text to analyze:
         
         return result
 
+    def process_documents(self, input_files: List[str], max_concurrent: int = 4) -> List[RedactionResult]:
+        """Process multiple documents concurrently (each document is I/O-bound on Azure calls)"""
+        logger.info("Processing %d documents with up to %d in flight", len(input_files), max_concurrent)
+
+        results = []
+        with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
+            futures = {executor.submit(self.process_document, f): f for f in input_files}
+            for future in as_completed(futures):
+                input_file = futures[future]
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    logger.error("Failed to process %s: %s", input_file, e)
+
+        logger.info("Batch complete: %d/%d documents redacted", len(results), len(input_files))
+        return results
+
+    def process_documents_batch(self, input_files: List[str]) -> List[RedactionResult]:
+        """Process documents via the Azure OpenAI Batch API (~50% token cost, higher latency).
+
+        Text extraction and redaction run locally; only the PII detection
+        prompts are submitted as one batch job instead of per-document
+        realtime calls. Use process_documents() when latency matters.
+        """
+        logger.info("Submitting %d documents to the Azure OpenAI Batch API", len(input_files))
+
+        # Step 1: Extract text for every document up front
+        texts = {}
+        for input_file in input_files:
+            analysis_result = self.analyze_document(input_file)
+            texts[input_file] = self.extract_text_content(analysis_result)
+
+        # Step 2: One JSONL request line per document, keyed by filename
+        batch_lines = []
+        for input_file, text_content in texts.items():
+            batch_lines.append(json.dumps({
+                "custom_id": input_file,
+                "method": "POST",
+                "url": "/chat/completions",
+                "body": {
+                    "model": self.aoai_deployment,
+                    "messages": [
+                        {
+                            "role": "system",
+                            "content": "You are an expert PII detection system. Return only valid JSON objects."
+                        },
+                        {"role": "user", "content": self._build_pii_prompt(text_content)}
+                    ],
+                    "temperature": 0.1,
+                    "max_tokens": 2000,
+                    "response_format": {"type": "json_object"}
+                }
+            }))
+
+        headers = {"api-key": self.aoai_key}
+
+        # Step 3: Upload the input file and create the batch job
+        upload_response = self._aoai_session.post(
+            f"{self.aoai_endpoint}/openai/files?api-version={self.aoai_version}",
+            headers=headers,
+            files={"file": ("pii_batch_input.jsonl", "\n".join(batch_lines).encode("utf-8"))},
+            data={"purpose": "batch"},
+            timeout=120
+        )
+        upload_response.raise_for_status()
+        input_file_id = upload_response.json()["id"]
+
+        batch_response = self._aoai_session.post(
+            f"{self.aoai_endpoint}/openai/batches?api-version={self.aoai_version}",
+            headers={**headers, "Content-Type": "application/json"},
+            data=_json_dumps_bytes({
+                "input_file_id": input_file_id,
+                "endpoint": "/chat/completions",
+                "completion_window": "24h"
+            }),
+            timeout=60
+        )
+        batch_response.raise_for_status()
+        batch_id = batch_response.json()["id"]
+        logger.info("Batch job created: %s", batch_id)
+
+        # Step 4: Poll the batch job with the same backoff schedule as DocIntel
+        delay = self.initial_polling_delay
+        while True:
+            poll_response = self._aoai_session.get(
+                f"{self.aoai_endpoint}/openai/batches/{batch_id}?api-version={self.aoai_version}",
+                timeout=60
+            )
+            poll_response.raise_for_status()
+            batch_status = poll_response.json()
+            status = batch_status.get("status", "").lower()
+
+            if status == "completed":
+                break
+            elif status in ("failed", "cancelled", "expired"):
+                raise RuntimeError(f"Batch job {batch_id} {status}: {batch_status.get('errors')}")
+
+            logger.debug("Batch status: %s (next poll in %.2fs)", status, delay)
+            time.sleep(delay)
+            delay = min(delay * 2, 60.0)
+
+        # Step 5: Download results and finish each document locally
+        output_response = self._aoai_session.get(
+            f"{self.aoai_endpoint}/openai/files/{batch_status['output_file_id']}/content"
+            f"?api-version={self.aoai_version}",
+            timeout=120
+        )
+        output_response.raise_for_status()
+
+        results = []
+        for line in output_response.text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            input_file = item["custom_id"]
+            ai_content = item["response"]["body"]["choices"][0]["message"]["content"].strip()
+            ai_entities = self._parse_ai_entities(ai_content)
+            results.append(self._finalize(input_file, texts[input_file], ai_entities))
+
+        logger.info("Batch API run complete: %d/%d documents redacted", len(results), len(input_files))
+        return results
+
 def main():
     """CLI interface for the PII redaction agent"""
     parser = argparse.ArgumentParser(description="Redact PII from documents using Azure AI")
-    parser.add_argument("--file", "-f", required=True, help="Input document file path")
+    parser.add_argument("--file", "-f", help="Input document file path")
+    parser.add_argument("--files", help="Glob of input documents to process concurrently")
     parser.add_argument("--output", "-o", help="Output file path (optional)")
     parser.add_argument("--report", "-r", help="Save redaction report to JSON file")
-    
+    parser.add_argument("--max-concurrent", type=int, default=4,
+                        help="Maximum documents processed in parallel with --files")
+    parser.add_argument("--batch", action="store_true",
+                        help="With --files, use the Azure OpenAI Batch API (cheaper, slower) "
+                             "instead of realtime calls")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Skip the on-disk cache of AI detection results")
+
+    parser.add_argument("--debug", action="store_true", help="Enable debug logging (per-poll status)")
+
     args = parser.parse_args()
-    
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s"
+    )
+
+    if not args.file and not args.files:
+        parser.error("Provide --file or --files")
+
+    if args.files:
+        input_files = sorted(glob.glob(args.files))
+        if not input_files:
+            print(f"No files match: {args.files}")
+            return
+        agent = PIIRedactionAgent(use_cache=not args.no_cache)
+        if args.batch:
+            results = agent.process_documents_batch(input_files)
+        else:
+            results = agent.process_documents(input_files, max_concurrent=args.max_concurrent)
+        print("\n" + "="*60)
+        print("BATCH REDACTION SUMMARY")
+        print("="*60)
+        for result in results:
+            print(f"{result.original_file} -> {result.redacted_file} "
+                  f"({result.redaction_summary['total_redactions']} redactions)")
+        return
+
     if not os.path.exists(args.file):
         print(f"File not found: {args.file}")
         return
-    
+
     try:
         # Initialize agent
-        agent = PIIRedactionAgent()
-        
+        agent = PIIRedactionAgent(use_cache=not args.no_cache)
+
         # Process document
         result = agent.process_document(args.file, args.output)
-        
+
         # Print summary
         print("\n" + "="*60)
         print("REDACTION SUMMARY")
@@ -48,19 +48,10 @@ def test_text_pii_detection():
         for entity in regex_entities:
             print(f"  - {entity.pii_type.value}: '{entity.text}' (confidence: {entity.confidence})")
         
-        # Create redacted version
+        # Create redacted version (AI entities first so they win position ties)
         all_entities = ai_entities + regex_entities
-        # Simple deduplication
-        unique_entities = []
-        for entity in all_entities:
-            is_duplicate = False
-            for existing in unique_entities:
-                if (abs(entity.start_position - existing.start_position) < 5):
-                    is_duplicate = True
-                    break
-            if not is_duplicate:
-                unique_entities.append(entity)
-        
+        unique_entities = agent.deduplicate_entities(all_entities)
+
         print(f"\nTotal unique PII entities found: {len(unique_entities)}")
         
         # Create redacted text
@@ -0,0 +1,17 @@
+# _http.py
+# Shared pooled HTTP session for the demo scripts. Keep-alive reuses one TLS
+# connection per host instead of paying a fresh TCP+TLS handshake per call —
+# the Document Intelligence poll loop alone can otherwise do ~30 handshakes.
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+)
+
+_SESSION = requests.Session()
+_SESSION.mount("https://", _adapter)
+_SESSION.mount("http://", _adapter)
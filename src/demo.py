@@ -21,34 +21,53 @@ Environment variables (recommended):
 """
 
 import os
+import re
 import json
 import time
 import base64
+import threading
 from typing import Any, Dict, List
 from pathlib import Path
 
 import requests
+from _http import _SESSION
+
+# One pattern handles comments, blank lines, and quote stripping, so parsing
+# is a single C-level scan instead of per-line strip/split/startswith.
+# [^\S\n] is "whitespace except newline" so an empty value never swallows the
+# following line; like the original parser, '#' is only a comment at line start.
+_ENV_LINE_RE = re.compile(
+    r'^[^\S\n]*([A-Za-z_][A-Za-z0-9_]*)[^\S\n]*=[^\S\n]*(?:"([^"]*)"|\'([^\']*)\'|([^\n]*?))[^\S\n]*$',
+    re.M,
+)
 
 # Load environment variables from .env file if it exists
 def load_env_file(env_path=".env"):
     """Load environment variables from a .env file"""
     env_file = Path(env_path)
     if env_file.exists():
-        with open(env_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    key, value = key.strip(), value.strip()
-                    if value.startswith('"') and value.endswith('"'):
-                        value = value[1:-1]
-                    elif value.startswith("'") and value.endswith("'"):
-                        value = value[1:-1]
-                    os.environ[key] = value
+        text = env_file.read_text(encoding='utf-8')
+        pairs = {
+            m.group(1): next(g for g in m.groups()[1:] if g is not None)
+            for m in _ENV_LINE_RE.finditer(text)
+        }
+        os.environ.update(pairs)
 
 # Try to load .env file at module import
 load_env_file()
 
+def _dump_truncated(obj: Any, limit: int = 12000) -> str:
+    """JSON-encode obj but stop once limit chars are produced (avoids
+    serializing a multi-MB analyze result just to slice the first 12KB)."""
+    parts: List[str] = []
+    total = 0
+    for piece in json.JSONEncoder().iterencode(obj):
+        parts.append(piece)
+        total += len(piece)
+        if total >= limit:
+            break
+    return "".join(parts)[:limit]
+
 # Optional import for Speech. Install only if you plan to run the Speech demo.
 try:
     import azure.cognitiveservices.speech as speechsdk  # pip install azure-cognitiveservices-speech
@@ -59,7 +78,7 @@ except Exception:
 # ---------------------------------------------------------------------------
 # Demo 2: Model Deployment + Endpoint Test (Azure OpenAI via Foundry endpoint)
 # ---------------------------------------------------------------------------
-def demo_aoai_chat_completions() -> Dict[str, Any]:
+def demo_aoai_chat_completions(verbose: bool = False) -> Dict[str, Any]:
     """
     Calls a deployed Azure OpenAI chat model (e.g., GPT‑4.1) using REST.
     Configure:
@@ -88,10 +107,13 @@ def demo_aoai_chat_completions() -> Dict[str, Any]:
         "temperature": 0.2
     }
 
-    resp = requests.post(url, headers=headers, json=payload, timeout=60)
+    resp = _SESSION.post(url, headers=headers, json=payload, timeout=60)
     resp.raise_for_status()
     data = resp.json()
-    print(json.dumps(data, indent=2))
+    if verbose:
+        print(json.dumps(data, indent=2))
+    else:
+        print(data["choices"][0]["message"]["content"])
     return data
 
 
@@ -116,20 +138,37 @@ def demo_speech_to_text(wav_path: str = "../data/audio/Recording.wav") -> str:
     audio_config = speechsdk.AudioConfig(filename=wav_path)
     recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_config)
 
+    # Continuous recognition captures every utterance in the file in one
+    # streaming session; recognize_once stops after the first ~15s utterance.
+    results: List[str] = []
+    done = threading.Event()
+
+    def _on_recognized(evt):
+        if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech and evt.result.text:
+            results.append(evt.result.text)
+
+    recognizer.recognized.connect(_on_recognized)
+    recognizer.session_stopped.connect(lambda evt: done.set())
+    recognizer.canceled.connect(lambda evt: done.set())
+
     print("Transcribing...")
-    result = recognizer.recognize_once_async().get()
-    if result.reason == speechsdk.ResultReason.RecognizedSpeech:
-        print("Transcript:", result.text)
-        return result.text
+    recognizer.start_continuous_recognition_async().get()
+    done.wait()
+    recognizer.stop_continuous_recognition_async().get()
+
+    transcript = " ".join(results)
+    if transcript:
+        print("Transcript:", transcript)
+        return transcript
     else:
-        print("No speech recognized or an error occurred:", result.reason)
+        print("No speech recognized or an error occurred.")
         return ""
 
 
 # ---------------------------------------------------------------------------
 # Demo 4: Service Endpoint – Translator (REST)
 # ---------------------------------------------------------------------------
-def demo_translator(text: str = "Good morning, welcome to the AI workshop", to_lang: str = "fr") -> List[Dict[str, Any]]:
+def demo_translator(text: str = "Good morning, welcome to the AI workshop", to_lang: str = "fr", verbose: bool = False) -> List[Dict[str, Any]]:
     """
     Translates text using Azure Translator REST API.
     Configure:
@@ -151,10 +190,13 @@ def demo_translator(text: str = "Good morning, welcome to the AI workshop", to_l
         "Content-Type": "application/json",
     }
     body = [{"text": text}]
-    resp = requests.post(url, params=params, headers=headers, json=body, timeout=60)
+    resp = _SESSION.post(url, params=params, headers=headers, json=body, timeout=60)
     resp.raise_for_status()
     data = resp.json()
-    print(json.dumps(data, indent=2, ensure_ascii=False))
+    if verbose:
+        print(json.dumps(data, indent=2, ensure_ascii=False))
+    else:
+        print(data[0]["translations"][0]["text"])
     return data
 
 
@@ -164,6 +206,7 @@ def demo_translator(text: str = "Good morning, welcome to the AI workshop", to_l
 def demo_document_intelligence_and_summarize(
     file_path: str = "../data/documents/TP25-40.pdf",
     model: str = "prebuilt-layout",
+    verbose: bool = False,
 ) -> Dict[str, Any]:
     """
     Uses Azure AI Document Intelligence Analyze REST API, then summarizes with Azure OpenAI.
@@ -184,10 +227,12 @@ def demo_document_intelligence_and_summarize(
     analyze_url = f"{docintel_endpoint}/formrecognizer/documentModels/{model}:analyze?api-version=2024-07-31"
     headers = {
         "Ocp-Apim-Subscription-Key": docintel_key,
-        "Content-Type": "application/pdf"
+        "Content-Type": "application/pdf",
     }
+    # Passing the file object lets requests stream the upload with a correct
+    # auto-computed Content-Length
     with open(file_path, "rb") as f:
-        analyze_resp = requests.post(analyze_url, headers=headers, data=f, timeout=60)
+        analyze_resp = _SESSION.post(analyze_url, headers=headers, data=f, timeout=60)
     analyze_resp.raise_for_status()
 
     # 2) Get operation-location to poll for result
@@ -195,16 +240,25 @@ def demo_document_intelligence_and_summarize(
     assert op_location, "No operation-location header returned"
     print("Analyze submitted. Polling for result...")
 
-    # 3) Poll for completion
-    for _ in range(30):
-        poll = requests.get(op_location, headers={"Ocp-Apim-Subscription-Key": docintel_key}, timeout=60)
+    # 3) Poll for completion with exponential backoff (honoring Retry-After)
+    delay = 0.25
+    deadline = time.monotonic() + 300
+    while True:
+        poll = _SESSION.get(op_location, headers={"Ocp-Apim-Subscription-Key": docintel_key}, timeout=60)
         poll.raise_for_status()
         result = poll.json()
         status = result.get("status", "").lower()
         print("Status:", status)
-        if status in ("succeeded", "failed"):
+        if status in ("succeeded", "failed") or time.monotonic() >= deadline:
             break
-        time.sleep(2)
+        retry_after = poll.headers.get("Retry-After")
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass  # HTTP-date form; keep the computed backoff
+        time.sleep(min(delay, 5.0))
+        delay *= 2
 
     if status != "succeeded":
         raise RuntimeError(f"Analyze did not succeed: {status}")
@@ -213,12 +267,13 @@ def demo_document_intelligence_and_summarize(
     content = result.get("analyzeResult", {})
     # Keep it compact for the LLM prompt
     compact = {
-        "pages": content.get("pages", []),
-        "keyValuePairs": content.get("keyValuePairs", []),
-        "tables": content.get("tables", []),
-        "paragraphs": content.get("paragraphs", [])[:5],  # limit to a few
+        "pages": content.get("pages", [])[:10],  # limit to a few
+        "keyValuePairs": content.get("keyValuePairs", [])[:50],
+        "tables": content.get("tables", [])[:5],
+        "paragraphs": content.get("paragraphs", [])[:5],
     }
-    print("Doc Intelligence (compact):", json.dumps(compact, indent=2))
+    if verbose:
+        print("Doc Intelligence (compact):", json.dumps(compact, indent=2))
 
     # 5) Summarize with Azure OpenAI
     endpoint = os.environ.get("AZURE_OPENAI_ENDPOINT", "").rstrip("/")
@@ -232,13 +287,16 @@ def demo_document_intelligence_and_summarize(
     prompt = (
         "Summarize the following document for a business stakeholder. "
         "Include who/what/when/amounts. Be concise:\n\n"
-        f"{json.dumps(compact)[:12000]}"
+        f"{_dump_truncated(compact)}"
     )
     payload = {"messages": [{"role": "user", "content": prompt}], "temperature": 0.2}
-    aoai_resp = requests.post(url, headers=headers, json=payload, timeout=120)
+    aoai_resp = _SESSION.post(url, headers=headers, json=payload, timeout=120)
     aoai_resp.raise_for_status()
     aoai_data = aoai_resp.json()
-    print("Summary:", json.dumps(aoai_data, indent=2))
+    if verbose:
+        print("Summary:", json.dumps(aoai_data, indent=2))
+    else:
+        print("Summary:", aoai_data["choices"][0]["message"]["content"])
     return {"docintel": result, "summary": aoai_data}
 
 
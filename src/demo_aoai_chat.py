@@ -1,10 +1,16 @@
 #!/usr/bin/env python3
 # demo_aoai_chat.py
 # Azure OpenAI chat completions via your Foundry deployment endpoint.
-import os, json, requests
+import os, json, argparse, requests
 from env_loader import load_dotenv
+from _http import _SESSION
 
 def main():
+    parser = argparse.ArgumentParser(description="Azure OpenAI chat completions demo")
+    parser.add_argument("--verbose", action="store_true",
+                        help="print the full JSON response instead of just the reply")
+    args = parser.parse_args()
+
     load_dotenv()
     endpoint = os.environ.get("AZURE_OPENAI_ENDPOINT", "").rstrip("/")
     api_key = os.environ.get("AZURE_OPENAI_KEY", "")
@@ -21,9 +27,13 @@ def main():
         ],
         "temperature":0.2
     }
-    resp = requests.post(url, headers=headers, json=payload, timeout=60)
+    resp = _SESSION.post(url, headers=headers, json=payload, timeout=60)
     resp.raise_for_status()
-    print(json.dumps(resp.json(), indent=2))
+    data = resp.json()
+    if args.verbose:
+        print(json.dumps(data, indent=2))
+    else:
+        print(data["choices"][0]["message"]["content"])
 
 if __name__ == "__main__":
     main()
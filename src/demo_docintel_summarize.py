@@ -1,8 +1,32 @@
 #!/usr/bin/env python3
 # demo_docintel_summarize.py
 # Analyze a PDF with Azure AI Document Intelligence, then summarize via Azure OpenAI.
-import os, json, time, requests
+import os, json, time, argparse, threading, requests
+from concurrent.futures import ThreadPoolExecutor
 from env_loader import load_dotenv
+from _http import _SESSION
+
+BATCH_EXTENSIONS = (".pdf", ".png", ".jpg", ".jpeg", ".tiff")
+
+# Optional: orjson decodes/encodes the large analyze payloads several times
+# faster than stdlib json. Falls back silently if not installed.
+try:
+    import orjson  # pip install orjson
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
+def _warm_aoai_connection():
+    """Open a keep-alive connection to the AOAI endpoint so the TLS handshake
+    happens while DocIntel is still polling, not on the summarize call."""
+    endpoint = os.environ.get("AZURE_OPENAI_ENDPOINT","").rstrip("/")
+    if not endpoint:
+        return
+    try:
+        _SESSION.head(endpoint, timeout=10)
+    except requests.RequestException:
+        pass  # best-effort: the real call will connect normally
 
 def analyze_document(file_path: str, model: str, endpoint: str, key: str):
     # Try a more stable API version
@@ -15,12 +39,17 @@ def analyze_document(file_path: str, model: str, endpoint: str, key: str):
     elif file_path.lower().endswith('.tiff'):
         content_type = "image/tiff"
     
-    headers = {"Ocp-Apim-Subscription-Key": key, "Content-Type": content_type}
+    headers = {
+        "Ocp-Apim-Subscription-Key": key,
+        "Content-Type": content_type,
+    }
     print(f"Analyzing {file_path} with endpoint: {url}")
     print(f"Content-Type: {content_type}")
-    
+
+    # Passing the file object lets requests stream the upload with a correct
+    # auto-computed Content-Length
     with open(file_path, "rb") as f:
-        r = requests.post(url, headers=headers, data=f, timeout=60)
+        r = _SESSION.post(url, headers=headers, data=f, timeout=60)
     
     if not r.ok:
         print(f"Error {r.status_code}: {r.text}")
@@ -31,17 +60,48 @@ def analyze_document(file_path: str, model: str, endpoint: str, key: str):
     op = r.headers.get("operation-location")
     if not op:
         raise RuntimeError("No operation-location header returned")
-    for _ in range(30):
-        poll = requests.get(op, headers={"Ocp-Apim-Subscription-Key": key}, timeout=60)
+    # Exponential backoff: small docs finish in well under 2s, large ones get
+    # a wall-clock budget instead of a fixed iteration count.
+    delay = 0.25
+    deadline = time.monotonic() + 300
+    while time.monotonic() < deadline:
+        poll = _SESSION.get(op, headers={"Ocp-Apim-Subscription-Key": key}, timeout=60)
         poll.raise_for_status()
-        data = poll.json()
+        data = _json_loads(poll.content)
         status = data.get("status","").lower()
         print("Status:", status)
         if status in ("succeeded","failed"):
             return data
-        time.sleep(2)
+        retry_after = poll.headers.get("Retry-After")
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass  # HTTP-date form; keep the computed backoff
+        time.sleep(min(delay, 5.0))
+        delay *= 2
     raise RuntimeError("Timeout polling analyze operation")
 
+def _dump_truncated(obj, limit: int = 12000) -> str:
+    """Serialize obj to JSON but stop once limit chars are produced.
+
+    json.dumps would encode the whole analyze result (potentially MBs) only
+    for the caller to slice off the first few KB; iterencode lets us bail
+    out as soon as the budget is met.
+    """
+    if orjson is not None:
+        # compact is already pre-capped to first-N slices, so a full orjson
+        # encode is both small and faster than stdlib iterencode
+        return orjson.dumps(obj).decode()[:limit]
+    parts = []
+    total = 0
+    for piece in json.JSONEncoder().iterencode(obj):
+        parts.append(piece)
+        total += len(piece)
+        if total >= limit:
+            break
+    return "".join(parts)[:limit]
+
 def summarize_with_aoai(summary_input: dict) -> dict:
     aoai_endpoint = os.environ.get("AZURE_OPENAI_ENDPOINT","").rstrip("/")
     aoai_key = os.environ.get("AZURE_OPENAI_KEY","")
@@ -51,34 +111,76 @@ def summarize_with_aoai(summary_input: dict) -> dict:
     url = f"{aoai_endpoint}/openai/deployments/{aoai_deployment}/chat/completions?api-version={aoai_version}"
     headers = {"Content-Type":"application/json","api-key":aoai_key}
     compact = {
-        "pages": summary_input.get("analyzeResult",{}).get("pages",[]),
-        "keyValuePairs": summary_input.get("analyzeResult",{}).get("keyValuePairs",[]),
-        "tables": summary_input.get("analyzeResult",{}).get("tables",[]),
+        "pages": summary_input.get("analyzeResult",{}).get("pages",[])[:10],
+        "keyValuePairs": summary_input.get("analyzeResult",{}).get("keyValuePairs",[])[:50],
+        "tables": summary_input.get("analyzeResult",{}).get("tables",[])[:5],
         "paragraphs": summary_input.get("analyzeResult",{}).get("paragraphs",[])[:5],
     }
     prompt = (
         "Summarize the following document for a business stakeholder. "
         "Include who/what/when/amounts. Be concise:\n\n"
-        + json.dumps(compact)[:12000]
+        + _dump_truncated(compact)
     )
     payload = {"messages":[{"role":"user","content":prompt}],"temperature":0.2}
-    r = requests.post(url, headers=headers, json=payload, timeout=120)
+    r = _SESSION.post(url, headers=headers, json=payload, timeout=120)
     r.raise_for_status()
-    return r.json()
+    return _json_loads(r.content)
+
+def _pipeline(path: str, model: str, endpoint: str, key: str) -> dict:
+    """Analyze one document and summarize it; unit of work for the batch mode."""
+    analysis = analyze_document(path, model, endpoint, key)
+    summary = summarize_with_aoai(analysis)
+    return {"file": path, "docintel": analysis, "summary": summary}
 
 def main():
+    parser = argparse.ArgumentParser(description="Analyze a document with DocIntel and summarize via Azure OpenAI")
+    parser.add_argument("--batch", metavar="DIR", nargs="?", const="../data/images",
+                        help="process every document in DIR concurrently instead of a single file")
+    parser.add_argument("--verbose", action="store_true",
+                        help="print the full analyze + summary JSON instead of just the summary text")
+    args = parser.parse_args()
+
     load_dotenv()
     di_endpoint = os.environ.get("AZURE_DOCINTEL_ENDPOINT","")
     di_key = os.environ.get("AZURE_DOCINTEL_KEY","")
-    pdf = os.environ.get("DOCINTEL_FILE","../data/images/receipt.png")
     model = os.environ.get("DOCINTEL_MODEL","prebuilt-layout")
     assert di_endpoint and di_key, "Set AZURE_DOCINTEL_ENDPOINT and AZURE_DOCINTEL_KEY in .env"
 
+    if args.batch:
+        files = sorted(
+            os.path.join(args.batch, name)
+            for name in os.listdir(args.batch)
+            if name.lower().endswith(BATCH_EXTENSIONS)
+        )
+        if not files:
+            raise SystemExit(f"No documents found in {args.batch}")
+        print(f"Batch mode: {len(files)} documents from {args.batch}")
+        # Threads overlap one file's polling wait with another's analyze and
+        # summarize calls; 8 workers also caps outstanding AOAI requests.
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for result in executor.map(
+                lambda p: _pipeline(p, model, di_endpoint, di_key), files
+            ):
+                content = result["summary"].get("choices",[{}])[0].get("message",{}).get("content","")
+                print(f"\n=== {result['file']} ===")
+                print(content)
+        return
+
+    pdf = os.environ.get("DOCINTEL_FILE","../data/images/receipt.png")
     print("Analyzing:", pdf)
+    # Prime the AOAI connection in the background while DocIntel polls
+    warmup = threading.Thread(target=_warm_aoai_connection, daemon=True)
+    warmup.start()
     analysis = analyze_document(pdf, model, di_endpoint, di_key)
     print("Analyze complete.")
+    warmup.join(timeout=10)
     summary = summarize_with_aoai(analysis)
-    print(json.dumps({"docintel": analysis, "summary": summary}, indent=2))
+    if args.verbose:
+        # Full dump can be megabytes for a large document; only pay the
+        # serialization + TTY write cost when explicitly asked
+        print(json.dumps({"docintel": analysis, "summary": summary}, indent=2))
+    else:
+        print(summary.get("choices",[{}])[0].get("message",{}).get("content",""))
 
 if __name__ == "__main__":
     main()
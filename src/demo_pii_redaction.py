@@ -6,11 +6,18 @@ Quick demo of the PII redaction agent
 
 import os
 import sys
+import logging
 sys.path.append('..')
 from pii_redaction_agent import PIIRedactionAgent
 from env_loader import load_dotenv
 
 def main():
+    # The agent reports progress through logging; without this the demo is
+    # silent between the banner and the completion message
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s"
+    )
     load_dotenv('../config/.env')
     
     print("PII Redaction Agent Demo")
@@ -2,6 +2,7 @@
 # demo_speech_to_text.py
 # Transcribe an audio file using Azure AI Speech SDK.
 import os
+import threading
 from env_loader import load_dotenv
 
 def main():
@@ -18,9 +19,23 @@ def main():
     speech_config = speechsdk.SpeechConfig(subscription=speech_key, region=speech_region)
     audio_config = speechsdk.AudioConfig(filename=audio_path)
     recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_config)
+
+    # Use continuous recognition so multi-utterance recordings are fully
+    # transcribed in one streaming session (recognize_once stops after the
+    # first utterance).
+    results = []
+    done = threading.Event()
+    recognizer.recognized.connect(
+        lambda evt: results.append(evt.result.text) if evt.result.text else None
+    )
+    recognizer.session_stopped.connect(lambda evt: done.set())
+    recognizer.canceled.connect(lambda evt: done.set())
+
     print("Transcribing:", audio_path)
-    result = recognizer.recognize_once_async().get()
-    print("Result:", getattr(result, "text", result))
+    recognizer.start_continuous_recognition_async().get()
+    done.wait()
+    recognizer.stop_continuous_recognition_async().get()
+    print("Result:", " ".join(results))
 
 if __name__ == "__main__":
     main()
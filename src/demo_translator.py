@@ -1,14 +1,35 @@
 #!/usr/bin/env python3
 # demo_translator.py
 # Translate a sentence using Azure Translator REST API.
-import os, json, requests
+import os, json, argparse, requests
 from env_loader import load_dotenv
+from _http import _SESSION
+
+# Translator v3 accepts up to 100 texts per request
+MAX_TEXTS_PER_REQUEST = 100
+
+def _parse_texts(raw: str) -> list:
+    """Interpret TRANSLATE_TEXT as a JSON list, newline-separated lines, or a
+    single sentence."""
+    try:
+        parsed = json.loads(raw)
+        if isinstance(parsed, list):
+            return [str(t) for t in parsed if str(t).strip()]
+    except ValueError:
+        pass
+    lines = [line.strip() for line in raw.splitlines() if line.strip()]
+    return lines if lines else [raw]
 
 def main():
+    parser = argparse.ArgumentParser(description="Azure Translator demo")
+    parser.add_argument("--verbose", action="store_true",
+                        help="print the full JSON response instead of just the translations")
+    args = parser.parse_args()
+
     load_dotenv()
     key = os.environ.get("AZURE_TRANSLATOR_KEY", "")
     region = os.environ.get("AZURE_TRANSLATOR_REGION", "")
-    text = os.environ.get("TRANSLATE_TEXT", "Good morning, welcome to the AI workshop")
+    texts = _parse_texts(os.environ.get("TRANSLATE_TEXT", "Good morning, welcome to the AI workshop"))
     to_lang = os.environ.get("TRANSLATE_TO", "fr")
     assert key and region, "Set AZURE_TRANSLATOR_KEY and AZURE_TRANSLATOR_REGION in .env"
 
@@ -19,10 +40,18 @@ def main():
         "Ocp-Apim-Subscription-Region": region,
         "Content-Type":"application/json"
     }
-    body = [{"text": text}]
-    resp = requests.post(url, params=params, headers=headers, json=body, timeout=60)
-    resp.raise_for_status()
-    print(json.dumps(resp.json(), indent=2, ensure_ascii=False))
+    # One POST per 100 texts instead of one per sentence
+    results = []
+    for start in range(0, len(texts), MAX_TEXTS_PER_REQUEST):
+        body = [{"text": t} for t in texts[start:start + MAX_TEXTS_PER_REQUEST]]
+        resp = _SESSION.post(url, params=params, headers=headers, json=body, timeout=60)
+        resp.raise_for_status()
+        results.extend(resp.json())
+    if args.verbose:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        for item in results:
+            print(item["translations"][0]["text"])
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,26 @@
 # env_loader.py
 # Minimal .env loader (no external dependency). Loads KEY=VALUE pairs into os.environ.
 import os
+from functools import lru_cache
 from pathlib import Path
 
+@lru_cache(maxsize=8)
+def _parse(path: str, mtime: float) -> dict:
+    """Parse a .env file into a dict; mtime keys the cache so edits invalidate it"""
+    pairs = {}
+    for raw in Path(path).read_text(encoding="utf-8").splitlines():
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if "=" not in line:
+            continue
+        k, v = line.split("=", 1)
+        k = k.strip()
+        v = v.strip().strip("'").strip('"')
+        if k and v:  # Remove the "and k not in os.environ" condition
+            pairs[k] = v
+    return pairs
+
 def load_dotenv(dotenv_path: str = None):
     if dotenv_path is None:
         # Try multiple possible locations
@@ -18,18 +36,12 @@ def load_dotenv(dotenv_path: str = None):
                 break
         if dotenv_path is None:
             return
-    
+
     p = Path(dotenv_path)
     if not p.exists():
         return
-    for raw in p.read_text(encoding="utf-8").splitlines():
-        line = raw.strip()
-        if not line or line.startswith("#"):
-            continue
-        if "=" not in line:
-            continue
-        k, v = line.split("=", 1)
-        k = k.strip()
-        v = v.strip().strip("'").strip('"')
-        if k and v:  # Remove the "and k not in os.environ" condition
-            os.environ[k] = v
+    pairs = _parse(str(p), p.stat().st_mtime)
+    # Skip the setenv calls entirely when nothing would change
+    if all(os.environ.get(k) == v for k, v in pairs.items()):
+        return
+    os.environ.update(pairs)